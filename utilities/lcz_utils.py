@@ -1,8 +1,96 @@
 from typing import Literal
+from functools import lru_cache
+from numbers import Real
+import os
 import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _read_json(file_path: str):
+    """
+    Read and decode the JSON file at `file_path`, using `orjson` when it is installed
+    and falling back to the standard `json` module otherwise.
+    """
+
+    if orjson is not None:
+        with open(file_path, "rb") as file:
+            return orjson.loads(file.read())
+
+    with open(file_path, "r") as file:
+        return json.load(file)
+
+
+@lru_cache(maxsize=None)
+def _load_LCZ_num_to_class(mapper_file_path: str) -> dict:
+    """
+    Load the map between LCZ numerical codes and classes from the JSON file at
+    `mapper_file_path`. The result is cached per path, so the file is only parsed once
+    per process.
+    """
+
+    # [NOTE: JSON keys are always strings, hence the conversion of the LCZ numerical
+    # codes into integers.]
+    LCZ_num_to_class = {
+        int(key): value for key, value in _read_json(mapper_file_path).items()
+    }
+
+    return LCZ_num_to_class
+
+
+@lru_cache(maxsize=None)
+def _load_LCZ_class_palette(mapper_file_path: str) -> dict:
+    """
+    Load the map between LCZ classes and colors from the JSON file at
+    `mapper_file_path`. The result is cached per path, so the file is only parsed once
+    per process.
+    """
+
+    LCZ_class_to_palette = _read_json(mapper_file_path)
+
+    return LCZ_class_to_palette
+
+
+@lru_cache(maxsize=None)
+def _get_LCZ_code_lookup(mapper_file_path: str) -> tuple[np.ndarray, np.ndarray, list]:
+    """
+    Build, from the JSON mapper at `mapper_file_path`, the lookup arrays that convert
+    LCZ numerical codes to categorical codes: the sorted LCZ numerical codes, the
+    category code of each of them, and the LCZ classes used as categories (without
+    duplicates and ordered as in the mapper). The result is cached per path.
+    """
+
+    LCZ_num_to_class = _load_LCZ_num_to_class(mapper_file_path)
+
+    # Define the LCZ classes as categories, without duplicates and ordered as in the
+    # mapper
+    LCZ_categories = list(dict.fromkeys(LCZ_num_to_class.values()))
+    LCZ_class_to_code = {
+        LCZ_class: LCZ_code for LCZ_code, LCZ_class in enumerate(LCZ_categories)
+    }
+
+    # Sort the LCZ numerical codes along with their category codes
+    LCZ_keys = np.fromiter(LCZ_num_to_class.keys(), dtype=np.int64)
+    LCZ_key_codes = np.fromiter(
+        (LCZ_class_to_code[LCZ_class] for LCZ_class in LCZ_num_to_class.values()),
+        dtype=np.int64,
+    )
+    order = np.argsort(LCZ_keys, kind="stable")
+    LCZ_keys_sorted = LCZ_keys[order]
+    LCZ_key_codes_sorted = LCZ_key_codes[order]
+
+    # [NOTE: the arrays are shared by every call, so they are made read-only.]
+    LCZ_keys_sorted.flags.writeable = False
+    LCZ_key_codes_sorted.flags.writeable = False
+
+    return LCZ_keys_sorted, LCZ_key_codes_sorted, LCZ_categories
+
 
 def convert_LCZ_num_to_class(
     LCZ_num: pd.Series,
@@ -24,7 +112,9 @@ def convert_LCZ_num_to_class(
     Returns:
     -------
     pd.Series
-        The LCZ classes associated with the input LCZ numerical codes.
+        The LCZ classes associated with the input LCZ numerical codes, as a categorical
+        Series whose categories are the LCZ classes found in the input, ordered as in
+        the mapper.
 
     Raises:
     ------
@@ -34,15 +124,52 @@ def convert_LCZ_num_to_class(
         If the JSON file is malformed or cannot be decoded.
     """
 
-    # Get dictionary map between LCZ numerical codes and classes
-    with open(mapper_file_path, "r") as file:
-        LCZ_num_to_class = json.load(
-            file,
-            object_hook=lambda dct: {int(key): value for key, value in dct.items()},
+    # Get lookup arrays between LCZ numerical codes and category codes
+    # [NOTE: the path is resolved so that different spellings of the same file share
+    # the same cache entry.]
+    LCZ_keys_sorted, LCZ_key_codes_sorted, LCZ_categories = _get_LCZ_code_lookup(
+        os.path.realpath(mapper_file_path)
+    )
+
+    # Map LCZ numerical codes into category codes through a binary search of their
+    # unique values on the sorted mapper codes
+    # [NOTE: codes absent from the mapper are given the code -1, i.e. a missing value.]
+    # [NOTE: the LCZ numerical codes are first made categorical, so that only their
+    # unique values are searched for, and then their categories are renamed into
+    # category codes of the LCZ classes. A categorical input keeps its codes. This
+    # per-element step costs less than a compiled per-element binary search (e.g. with
+    # Numba), which is therefore not used.]
+    LCZ_num_cat = pd.Categorical(LCZ_num)
+    # [NOTE: non-numeric values (e.g. strings, even if they spell a code) are not LCZ
+    # numerical codes and are therefore given a missing value, as done by `Series.map`.]
+    if pd.api.types.is_numeric_dtype(LCZ_num_cat.categories):
+        LCZ_num_unique = LCZ_num_cat.categories.to_numpy(dtype=np.float64)
+    else:
+        LCZ_num_unique = np.array(
+            [
+                LCZ_value if isinstance(LCZ_value, Real) else np.nan
+                for LCZ_value in LCZ_num_cat.categories
+            ],
+            dtype=np.float64,
         )
+    idx = np.searchsorted(LCZ_keys_sorted, LCZ_num_unique)
+    idx = np.minimum(idx, len(LCZ_keys_sorted) - 1)
+    LCZ_unique_codes = np.where(
+        LCZ_keys_sorted[idx] == LCZ_num_unique, LCZ_key_codes_sorted[idx], -1
+    )
+    # [NOTE: a trailing -1 is appended, so that missing values (code -1) stay missing.]
+    LCZ_codes = np.append(LCZ_unique_codes, -1)[LCZ_num_cat.codes]
 
-    # Map LCZ numerical codes into classes
-    LCZ_class = LCZ_num.map(LCZ_num_to_class)
+    # Build categorical LCZ classes from the category codes
+    # [NOTE: only the LCZ classes found in the input are kept as categories, so that,
+    # e.g., a palette does not need to cover the classes that never occur.]
+    LCZ_class = pd.Series(
+        pd.Categorical.from_codes(
+            LCZ_codes, categories=LCZ_categories
+        ).remove_unused_categories(),
+        index=LCZ_num.index,
+        name=LCZ_num.name,
+    )
 
     return LCZ_class
 
@@ -54,6 +181,10 @@ def load_LCZ_class_palette(
     Load the color palette for Local Climate Zone classes from a JSON file. This palette
     has been taken from QGIS software.
 
+    The palette is cached per file, but the recommended pattern is still to load it
+    once, at import, into a module-level constant (e.g. `LCZ_CLASS_TO_PALETTE`) rather
+    than within the data pipeline, as done in `example.ipynb`.
+
     Parameters
     ----------
     mapper_file_path : str
@@ -74,8 +205,11 @@ def load_LCZ_class_palette(
     """
 
     # Get color palette for the LCZ classes
-    with open(mapper_file_path, "r") as file:
-        LCZ_class_to_palette = json.load(file)
+    # [NOTE: a copy is returned so that callers may modify it without altering the
+    # cached palette.]
+    LCZ_class_to_palette = dict(
+        _load_LCZ_class_palette(os.path.realpath(mapper_file_path))
+    )
 
     return LCZ_class_to_palette
 
@@ -119,25 +253,26 @@ def get_LCZ_order(
     """
 
     # Get dictionary map between LCZ numerical codes and classes
-    with open(mapper_file_path, "r") as file:
-        LCZ_num_to_class = json.load(
-            file,
-            object_hook=lambda dct: {int(key): value for key, value in dct.items()},
-        )
+    # [NOTE: the path is resolved so that different spellings of the same file share
+    # the same cache entry.]
+    LCZ_num_to_class = _load_LCZ_num_to_class(os.path.realpath(mapper_file_path))
 
     # Get unique values of the given LCZ
-    LCZ_unique = LCZ.unique()
+    LCZ_unique = set(LCZ.unique().tolist())
 
     # Get reference LCZ values as stated in the mapper
-    match LCZ_kind:
-        case "num":
-            LCZ_ref = LCZ_num_to_class.keys()
-        case "class":
-            LCZ_ref = LCZ_num_to_class.values()
-        case _:
-            ValueError('Error: LCZ_kind must be "num" or "class"')
+    LCZ_ref_getters = {
+        "num": LCZ_num_to_class.keys,
+        "class": LCZ_num_to_class.values,
+    }
+    try:
+        LCZ_ref = LCZ_ref_getters[LCZ_kind]()
+    except KeyError:
+        raise ValueError('Error: LCZ_kind must be "num" or "class"') from None
 
     # Define a list of unique values of the given LCZ, ordered as in the mapper
-    LCZ_order = [LCZ for LCZ in LCZ_ref if LCZ in LCZ_unique]
+    # [NOTE: the mapper values may repeat, hence the reference values are deduplicated
+    # while keeping their order.]
+    LCZ_order = [LCZ for LCZ in dict.fromkeys(LCZ_ref) if LCZ in LCZ_unique]
 
     return LCZ_order
@@ -1,6 +1,34 @@
+from typing import Literal
+from functools import lru_cache
 import numpy as np
+import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.colors import to_rgba, to_hex
+from matplotlib.lines import Line2D
+
+try:
+    import datashader as ds
+    import datashader.transfer_functions as tf
+except ImportError:
+    ds = None
+
+
+@lru_cache(maxsize=None)
+def _get_palette_rgba(colors: tuple) -> np.ndarray:
+    """
+    Convert the given `colors` into an array of RGBA values, one row per color. The
+    result is cached per sequence of colors, so that repeated plots with the same
+    palette do not parse the colors again.
+    """
+
+    palette_rgba = np.array([to_rgba(color) for color in colors], dtype=np.float32)
+
+    # [NOTE: the array is shared by every call, so it is made read-only.]
+    palette_rgba.flags.writeable = False
+
+    return palette_rgba
 
 
 def plot_pred_vs_actual(
@@ -16,7 +44,10 @@ def plot_pred_vs_actual(
     scores: dict | None = None,
     use_hue: bool = True,
     print_scores: bool = True,
-) -> None:
+    use_latex: bool = False,
+    ax: Axes | None = None,
+    backend: Literal["matplotlib", "datashader"] = "matplotlib",
+) -> Axes:
     """
     Plot a scatter plot comparing actual vs predicted values, with optional color
     grouping based on a hue variable. Also display an ideal diagonal line on the plot
@@ -32,11 +63,15 @@ def plot_pred_vs_actual(
         The name of the column in the DataFrame representing the predicted values.
     col_hue : str, optional
         The name of the column in the DataFrame to be used for color grouping (hue) if
-        `use_hue` is set to `True`, by default `None`.
+        `use_hue` is set to `True`, by default `None`. The hue is always treated as
+        categorical: each of its values, even if numeric (e.g. LCZ numerical codes),
+        gets its own color and legend entry.
     hue_title_fancy : str, optional
         The title for the legend of the hue variable, by default `None`.
     hue_order : list or np.ndarray, optional
         The order of hue categories to be displayed in the legend, by default `None`.
+        If `None`, the categories found in the hue are used, ordered as the categories
+        of a categorical hue, sorted if numeric, or in order of appearance otherwise.
     hue_palette : dict, optional
         A dictionary specifying colors for each hue category, by default `None`.
     target_title_fancy : str, optional
@@ -49,57 +84,198 @@ def plot_pred_vs_actual(
         `None`.
     use_hue : bool, optional
         Whether to apply color grouping based on the hue variable, by default `True`.
+        Ignored if `col_hue` is `None`.
     print_scores : bool, optional
         Whether to print the regression scores on the plot, by default `True`.
+    use_latex : bool, optional
+        Whether to render the text with LaTeX, which must then be installed, by default
+        `False`. Otherwise, the text is rendered with matplotlib's mathtext, which is
+        much faster. The labels of the hue categories are always rendered with
+        mathtext.
+    ax : matplotlib.axes.Axes, optional
+        The axes to plot on, by default `None`. If `None`, a new figure is created and
+        displayed; otherwise, the plot is drawn on the given axes and it is up to the
+        caller to display it, which allows composing several plots on the same figure.
+    backend : Literal["matplotlib", "datashader"], optional
+        The backend used to draw the markers:
+        - `"matplotlib"`: each marker is drawn as a scatter point (default).
+        - `"datashader"`: the markers are aggregated into an image with `datashader`,
+          which must then be installed. Recommended for very large amounts of data.
 
     Returns
     -------
-    None
-        This function does not return anything. It directly displays the plot.
+    matplotlib.axes.Axes
+        The axes with the plot.
 
     Raises
     ------
     ValueError
         If the given columns for actual or predicted values are not found in the
         DataFrame. Also if `use_hue` is set to `True` and the given column for the hue
-        is not found.
+        is not found. Also if `backend` is not one of the specified valid options:
+        "matplotlib" or "datashader".
+    ImportError
+        If `backend` is set to `"datashader"` and `datashader` is not installed.
     """
 
+    # Check the backend
+    if backend not in ("matplotlib", "datashader"):
+        raise ValueError('Error: backend must be "matplotlib" or "datashader"')
+    if backend == "datashader" and ds is None:
+        raise ImportError('Error: backend "datashader" requires datashader installed')
+
+    # Check that the given columns are found in the DataFrame
+    # [NOTE: all columns are checked at once, before getting any of them. No hue is
+    # applied if no column is given for it.]
+    use_hue = use_hue is True and col_hue is not None
+    cols = {col_actual, col_pred} | ({col_hue} if use_hue is True else set())
+    cols_missing = cols - set(df.columns)
+    if cols_missing:
+        raise ValueError(f"Error: columns not found in the DataFrame: {cols_missing}")
+
+    # Get actual, predicted and hue values as NumPy arrays
+    # [NOTE: single precision is enough for plotting and halves the memory needed.]
+    x_actual = df[col_actual].to_numpy(dtype=np.float32)
+    y_pred = df[col_pred].to_numpy(dtype=np.float32)
+    # [NOTE: the hue is kept as a Series, so that a categorical hue keeps its codes.]
+    hue = df[col_hue] if use_hue is True else None
+
+    # Define axes' ranges from the lowest and highest of all actual and predicted values
+    # [NOTE: missing values are ignored, as in pandas' reductions.]
+    # [NOTE: both bounds are computed in a single NumPy expression, padded by 5% of the
+    # range. They come from the single-precision values and may hence be slightly
+    # rounded, which is negligible for the axes' limits. Equal bounds are padded by 5%
+    # of their value instead, so that the axes' corners differ.]
+    lowest = np.minimum(np.nanmin(x_actual), np.nanmin(y_pred))
+    highest = np.maximum(np.nanmax(x_actual), np.nanmax(y_pred))
+    bounds = np.array([lowest, highest], dtype=np.float64)
+    bounds += np.array([-0.05, 0.05]) * ((bounds[1] - bounds[0]) or abs(bounds[0]) or 1)
+    x_min, x_max = bounds.tolist()
+
+    # Get the RGBA color of each hue category and of each marker
+    # [NOTE: hue values not found in `hue_order` are not plotted, as in seaborn.]
+    if use_hue is True:
+        # [NOTE: the hue is always treated as categorical, even if numeric: unlike in
+        # seaborn, a numeric hue is not mapped with a continuous colormap. By default,
+        # the hue categories are ordered as the categories of a categorical hue, sorted
+        # if numeric, or in order of appearance otherwise. Only the categories found in
+        # the hue are kept.]
+        if hue_order is None:
+            if isinstance(hue.dtype, pd.CategoricalDtype):
+                hue_order = list(hue.cat.remove_unused_categories().cat.categories)
+            else:
+                hue_order = list(hue.dropna().unique())
+                if pd.api.types.is_numeric_dtype(hue):
+                    hue_order.sort()
+        # [NOTE: by default, as in seaborn for categorical hues, the colors are taken
+        # from the current color cycle, or from the "husl" palette if there are more
+        # categories than colors in the cycle, so that each category has its own color.]
+        if hue_palette is None:
+            n_colors = len(hue_order)
+            palette_name = None if n_colors <= len(sns.color_palette()) else "husl"
+            hue_palette = dict(
+                zip(hue_order, sns.color_palette(palette_name, n_colors=n_colors))
+            )
+        # [NOTE: colors given as lists or arrays are turned into tuples, so that they
+        # can be used as cache keys.]
+        palette_rgba = _get_palette_rgba(
+            tuple(
+                (
+                    tuple(hue_palette[hue_value])
+                    if isinstance(hue_palette[hue_value], (list, np.ndarray))
+                    else hue_palette[hue_value]
+                )
+                for hue_value in hue_order
+            )
+        )
+        # [NOTE: the categories are set after building the categorical, which drops the
+        # values not found in `hue_order` without pandas' deprecation warning.]
+        hue_codes = pd.Categorical(hue).set_categories(hue_order).codes
+        is_hued = hue_codes >= 0
+        x_actual = x_actual[is_hued]
+        y_pred = y_pred[is_hued]
+        hue_codes = hue_codes[is_hued]
+        marker_colors = palette_rgba[hue_codes]
+    else:
+        marker_colors = None
+
     # Plot with given RC context
-    # [NOTE: seaborn uses matplotlib's RC (Runtime Configuration) and, therefore, there
-    # is no need to configure Seaborn's RC in particular.]
+    # [NOTE: the RC (Runtime Configuration) only holds for the text created within it.
+    # Settings of the axes are set on them, since they may have been created outside of
+    # it.]
     with plt.rc_context(
-        {"axes.axisbelow": True, "text.usetex": True, "font.family": "serif"}
+        {
+            "text.usetex": use_latex,
+            "font.family": "serif",
+            "mathtext.fontset": "cm",
+        }
     ):
-        # Initialise figure and axes
-        plt.figure(figsize=(9, 7))
-        ax = plt.axes()
+        # Initialise figure and axes, if not given
+        is_new_figure = ax is None
+        if is_new_figure:
+            _, ax = plt.subplots(figsize=(9, 7))
+
+        # Draw grid below the plotted data
+        ax.set_axisbelow(True)
 
-        plt.title(rf"Actual and predicted {target_title_fancy}", pad=20)
+        ax.set_title(rf"Actual and predicted {target_title_fancy}", pad=20)
 
         # Define scatter plot for actual and predicted target values
-        sns.scatterplot(
-            ax=ax,
-            data=df,
-            x=col_actual,
-            y=col_pred,
-            hue=col_hue if use_hue is True else None,
-            hue_order=hue_order if use_hue is True else None,
-            palette=hue_palette if use_hue is True else None,
-            alpha=1.0,
-            s=15,
-        )
+        if backend == "datashader":
+            # [NOTE: the markers are counted per pixel (and per hue category) over the
+            # axes' ranges and shaded into a single image, so that the drawing cost
+            # depends on the number of pixels rather than on the number of markers.]
+            points = pd.DataFrame({"x": x_actual, "y": y_pred})
+            canvas = ds.Canvas(
+                plot_width=800,
+                plot_height=800,
+                x_range=(x_min, x_max),
+                y_range=(x_min, x_max),
+            )
+            if use_hue is True:
+                points["hue"] = pd.Categorical.from_codes(
+                    hue_codes, categories=range(len(hue_order))
+                )
+                image = tf.shade(
+                    canvas.points(points, "x", "y", agg=ds.by("hue", ds.count())),
+                    color_key=[to_hex(hue_color) for hue_color in palette_rgba],
+                )
+            else:
+                image = tf.shade(
+                    canvas.points(points, "x", "y", agg=ds.count()),
+                    cmap=to_hex("C0"),
+                )
+            ax.imshow(
+                tf.spread(image, px=1).to_pil(),
+                extent=(x_min, x_max, x_min, x_max),
+                origin="upper",
+                interpolation="nearest",
+                zorder=1,
+            )
+        else:
+            # [NOTE: all markers are drawn in a single call, rather than one per hue
+            # category as seaborn does. The marker edges follow seaborn's style. The
+            # markers are rasterized, so that vector outputs (e.g. PDF) stay light and
+            # fast to render for large amounts of data.]
+            ax.scatter(
+                x_actual,
+                y_pred,
+                c=marker_colors,
+                alpha=1.0,
+                s=15,
+                edgecolors="white",
+                linewidths=0.08 * np.sqrt(15),
+                rasterized=True,
+            )
 
         # Plot text with the regression scores
         if print_scores is True and scores is not None:
             ax.text(
                 x=0.03,
                 y=0.97,
-                s="".join(
-                    [
-                        f"{score_title_fancy} $=$ ${score_value:.3f}$" + "\n"
-                        for (score_title_fancy, score_value) in scores.items()
-                    ]
+                s="\n".join(
+                    f"{score_title_fancy} $=$ ${score_value:.3f}$"
+                    for (score_title_fancy, score_value) in scores.items()
                 ),
                 fontsize=10,
                 color="black",
@@ -108,21 +284,16 @@ def plot_pred_vs_actual(
                 transform=ax.transAxes,
             )
 
-        # Define axes' ranges
-        x_min = df[[col_actual, col_pred]].min().min()
-        x_max = df[[col_actual, col_pred]].max().max()
-        Delta_x = x_max - x_min
-        x_min = x_min - 0.05 * Delta_x
-        x_max = x_max + 0.05 * Delta_x
-        y_min = x_min
-        y_max = x_max
+        # Set axes' ranges
         ax.set_xlim(x_min, x_max)
-        ax.set_ylim(y_min, y_max)
+        ax.set_ylim(x_min, x_max)
 
         # Define the ideal diagonal line
-        plt.axline(
-            xy1=(0, 0),
-            slope=1,
+        # [NOTE: the line is defined by the axes' corners, rather than by a point and
+        # a slope.]
+        ax.axline(
+            xy1=(x_min, x_min),
+            xy2=(x_max, x_max),
             color="black",
             linewidth=0.75,
             linestyle="solid",
@@ -165,8 +336,27 @@ def plot_pred_vs_actual(
         )
 
         # Legend
+        # [NOTE: the legend handles are built from the palette, so that the legend
+        # does not need to go through the plotted markers. The labels of the hue
+        # categories are rendered with mathtext even if `use_latex` is `True`, so that
+        # they do not each require a LaTeX run.]
         if use_hue is True:
-            plt.legend(
+            legend_handles = [
+                Line2D(
+                    [],
+                    [],
+                    marker="o",
+                    markersize=np.sqrt(15),
+                    markeredgecolor="white",
+                    markeredgewidth=0.08 * np.sqrt(15),
+                    linestyle="",
+                    color=hue_color,
+                    label=str(hue_value),
+                )
+                for hue_value, hue_color in zip(hue_order, palette_rgba)
+            ]
+            legend = ax.legend(
+                handles=legend_handles,
                 title=hue_title_fancy,
                 loc="center left",
                 fontsize=10,
@@ -174,6 +364,11 @@ def plot_pred_vs_actual(
                 framealpha=0,
                 bbox_to_anchor=(1, 0.5),
             )
+            for legend_text in legend.get_texts():
+                legend_text.set_usetex(False)
+
+        # Show plot, if the figure was created here
+        if is_new_figure:
+            plt.show()
 
-        # Show plot
-        plt.show()
+    return ax